@@ -0,0 +1,185 @@
+"""
+End-to-end benchmarks on synthetic data.
+
+Run from the repo root:
+    python benchmarks/run_benchmarks.py [benchmark ...] [--scale 2] [--profile cprofile|sample]
+
+Each benchmark is a stage in a RunReport, so the JSON written to
+benchmarks/results/ has wall/CPU time, peak memory and throughput for each.
+Benchmarks run one per subprocess, so each peak_rss_mb is that benchmark's
+own high-water mark rather than the largest of everything run before it.
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'data_acquisition'), os.path.join(ROOT, 'data_processing'),
+                os.path.join(ROOT, 'analysis')]
+
+from instrumentation import RunReport, count, run_subprocess
+import synthetic
+
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+
+def find_tesseract():
+    """Point pytesseract at whichever tesseract is installed; None if there isn't one"""
+    import pytesseract
+    tesseract = shutil.which('tesseract') or shutil.which(pytesseract.pytesseract.tesseract_cmd)
+    if tesseract:
+        pytesseract.pytesseract.tesseract_cmd = tesseract
+    return tesseract
+
+
+def bench_ocr_frames(report, scale):
+    import ocr_for_tla
+    if not find_tesseract():
+        print("Skipping ocr_frames - tesseract not found")
+        return
+
+    # Render up front so only OCR is timed
+    frames = list(synthetic.generate_overlay_frames(int(50 * scale)))
+    with report.stage('ocr_frames') as metrics:
+        for expected, frame in frames:
+            info = ocr_for_tla.extract_player_info_from_image(frame) or {}
+            count(metrics, 'frames')
+            for key, value in expected.items():
+                if info.get(key) == value:
+                    count(metrics, f'correct_{key}')
+
+def bench_pipelined_ingest(report, scale):
+    from download_videos import pipelined_ingest
+    if not find_tesseract():
+        print("Skipping pipelined_ingest - tesseract not found")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        frame_interval = 20
+        video_path = synthetic.write_overlay_video(
+            os.path.join(tmp_dir, 'overlay.mp4'), n_frames=int(400 * scale), frame_interval=frame_interval)
+        with report.stage('pipelined_ingest') as metrics:
+            frames, rows = pipelined_ingest(video_path, os.path.join(tmp_dir, 'output.csv'),
+                                            frame_interval=frame_interval)
+            # Frames that OCR couldn't read still cost decode and OCR time
+            count(metrics, 'frames', frames)
+            count(metrics, 'rows', rows)
+
+def bench_challonge_parse(report, scale):
+    import generate_base_data
+
+    matches_df = synthetic.generate_matches(n_tournaments=int(150 * scale))
+    participants, matches = synthetic.generate_challonge_payloads(matches_df)
+    tournaments = sorted(matches)
+
+    # Serve recorded payloads instead of the API, so this times parsing and not the network
+    original = generate_base_data.get_participants, generate_base_data.get_matches
+    generate_base_data.get_participants = participants.get
+    generate_base_data.get_matches = matches.get
+    try:
+        with report.stage('challonge_parse') as metrics:
+            tla_players, challonge_id_key = generate_base_data.generate_player_dict(tournaments)
+            parsed = generate_base_data.generate_match_data(tournaments, challonge_id_key)
+            parsed.replace(generate_base_data.get_most_frequent_names(tla_players), inplace=True)
+            count(metrics, 'matches', len(parsed))
+    finally:
+        generate_base_data.get_participants, generate_base_data.get_matches = original
+
+def bench_identify_tournaments(report, scale):
+    from minimum_tournament_list import identify_tournaments
+
+    matches_df = synthetic.generate_matches(n_tournaments=int(150 * scale))
+    with report.stage('identify_tournaments') as metrics:
+        identify_tournaments(matches_df)
+        count(metrics, 'matches', len(matches_df))
+
+def bench_ratings(report, scale):
+    # Only preparation and the fit are timed, not imports or plotting
+    from generate_ratings import organise_matches, fit_ratings
+
+    matches_df = synthetic.generate_matches(n_tournaments=int(150 * scale))
+    with report.stage('ratings') as metrics:
+        fit_ratings(organise_matches(matches_df))
+        count(metrics, 'matches', len(matches_df))
+
+def bench_clean_and_aggregate(report, scale):
+    from process_ocr import clean_and_aggregate_data
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = os.path.join(tmp_dir, 'output.csv')
+        ocr_df = synthetic.generate_ocr_rows(n_rows=int(20000 * scale))
+        ocr_df.to_csv(csv_path, index=False)
+        with report.stage('clean_and_aggregate') as metrics:
+            clean_and_aggregate_data(csv_path)
+            count(metrics, 'rows', len(ocr_df))
+
+
+BENCHMARKS = {
+    'ocr_frames': bench_ocr_frames,
+    'pipelined_ingest': bench_pipelined_ingest,
+    'challonge_parse': bench_challonge_parse,
+    'identify_tournaments': bench_identify_tournaments,
+    'ratings': bench_ratings,
+    'clean_and_aggregate': bench_clean_and_aggregate,
+}
+
+
+def run_isolated(name, scale, report):
+    """Run one benchmark in a fresh interpreter and copy its stage metrics into report"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        child_output = os.path.join(tmp_dir, 'report.json')
+        args = [sys.executable, os.path.abspath(__file__), name, '--scale', str(scale),
+                '--child-output', child_output]
+        if report.profile:
+            args += ['--profile', report.profile]
+        if report.trace_memory:
+            args.append('--trace-memory')
+        run_subprocess({}, args, cwd=ROOT)
+        with open(child_output, 'r') as f:
+            report.stages.update(json.load(f)['stages'])
+
+def run_benchmarks(names=None, scale=1, report=None, isolate=True):
+    """Run benchmarks into report, each in its own subprocess unless isolate is False"""
+    report = report or RunReport('benchmarks')
+    for name in names or BENCHMARKS:
+        if isolate:
+            run_isolated(name, scale, report)
+        else:
+            BENCHMARKS[name](report, scale)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark pipeline stages on synthetic data")
+    parser.add_argument('benchmarks', nargs='*', help=f"Benchmarks to run (default: all): {', '.join(BENCHMARKS)}")
+    parser.add_argument('--scale', type=float, default=1, help="Multiply synthetic data sizes")
+    parser.add_argument('--profile', choices=['cprofile', 'sample'], help="Write a profile per benchmark")
+    parser.add_argument('--trace-memory', action='store_true', help="Record tracemalloc peaks (slower)")
+    parser.add_argument('--output', help="Report path (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument('--in-process', action='store_true',
+                        help="Run every benchmark in this process; faster, but peak_rss_mb then accumulates")
+    # Used by run_isolated: run in-process and write the report here without the summary
+    parser.add_argument('--child-output', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    report = RunReport('benchmarks', profile=args.profile, profile_dir=os.path.join(RESULTS_DIR, 'profiles'),
+                       trace_memory=args.trace_memory)
+    if args.child_output:
+        run_benchmarks(args.benchmarks, args.scale, report, isolate=False)
+        report.write(args.child_output)
+        sys.exit(0)
+
+    run_benchmarks(args.benchmarks, args.scale, report, isolate=not args.in_process)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{report.started_at[:19].replace(':', '-')}.json")
+    report.write(output)
+    for name, metrics in report.stages.items():
+        rates = ', '.join(f'{value}/s {key}' for key, value in metrics.get('rates_per_second', {}).items())
+        print(f"{name}: {metrics['wall_seconds']}s, peak {metrics['peak_rss_mb']}MB, {rates}")
+    print(f"Report saved to {output}")
@@ -0,0 +1,186 @@
+"""
+Deterministic synthetic data for benchmarks.
+
+Everything takes a seed, so the same arguments always give the same data and
+timings stay comparable between runs.
+"""
+import datetime
+import numpy as np
+import pandas as pd
+
+CHARACTERS = ["Beef", "Pork", "Onion", "Garlic", "Rice", "Noodle"]
+START_DATE = datetime.datetime(2021, 1, 15, 18, 30, tzinfo=datetime.timezone(datetime.timedelta(hours=-5)))
+
+
+def player_names(n_players):
+    return [f"Player{i:04d}" for i in range(n_players)]
+
+def random_score(rng):
+    """Score strings in the shapes Challonge returns, including forfeits and multi-set scores"""
+    roll = rng.random()
+    if roll < 0.02:
+        return "0--1" if rng.random() < 0.5 else "-1-0"
+    winner_score = 3 if rng.random() < 0.7 else 2
+    score = f"{winner_score}-{rng.integers(0, winner_score)}"
+    if rng.random() < 0.5:
+        score = "-".join(reversed(score.split("-")))
+    if roll > 0.95:
+        score += f",{rng.integers(0, 4)}-{rng.integers(0, 4)}"
+    return score
+
+def generate_matches(n_tournaments=150, players_per_tournament=32, n_players=400, seed=0):
+    """A matches.csv-shaped DataFrame: one weekly TLG per tournament, single elimination rounds"""
+    rng = np.random.default_rng(seed)
+    names = player_names(n_players)
+    # Skewed attendance so some players are regulars, like the real data
+    weights = 1 / np.arange(1, n_players + 1)
+    weights /= weights.sum()
+
+    rows = []
+    for t in range(n_tournaments):
+        tournament = f"ToughLoveGauntlet{t + 1:03d}"
+        start = START_DATE + datetime.timedelta(weeks=t)
+        entrants = list(rng.choice(names, size=min(players_per_tournament, n_players), replace=False, p=weights))
+        round_number = 1
+        while len(entrants) > 1:
+            winners = []
+            for i in range(0, len(entrants) - 1, 2):
+                player_1, player_2 = entrants[i], entrants[i + 1]
+                rows.append({
+                    'date': (start + datetime.timedelta(minutes=len(rows) % 600)).isoformat(timespec='milliseconds'),
+                    'tournament': tournament,
+                    'round': str(round_number),
+                    'player_1': player_1,
+                    'player_2': player_2,
+                    'score': random_score(rng),
+                })
+                winners.append(player_1 if rng.random() < 0.5 else player_2)
+            if len(entrants) % 2:
+                winners.append(entrants[-1])
+            entrants = winners
+            round_number += 1
+    return pd.DataFrame(rows)
+
+def generate_challonge_payloads(matches_df, seed=0):
+    """
+    Challonge API-shaped participants and matches per tournament, built from a matches DataFrame.
+
+    Returns ({tournament: participants}, {tournament: matches}) as the API's parsed JSON.
+    """
+    rng = np.random.default_rng(seed)
+    user_ids = {name: 1000000 + i for i, name in enumerate(sorted(set(matches_df['player_1']) | set(matches_df['player_2'])))}
+
+    participants, matches = {}, {}
+    for tournament, group in matches_df.groupby('tournament'):
+        players = sorted(set(group['player_1']) | set(group['player_2']))
+        entry_ids = {name: int(rng.integers(10**8, 10**9)) for name in players}
+        participants[tournament] = [
+            {'participant': {'id': entry_ids[name], 'challonge_user_id': user_ids[name], 'name': name}}
+            for name in players
+        ]
+        matches[tournament] = [
+            {'match': {
+                'created_at': row.date,
+                'round': int(row.round),
+                'player1_id': entry_ids[row.player_1],
+                'player2_id': entry_ids[row.player_2],
+                'scores_csv': row.score,
+            }}
+            for row in group.itertuples()
+        ]
+    return participants, matches
+
+def generate_ocr_rows(n_rows=20000, n_matchups=200, n_players=400, seed=0, noise=0.2):
+    """
+    An ocr_for_tla output-shaped DataFrame.
+
+    Each matchup contributes a run of consecutive frames; noise is the share of
+    frames where OCR misread a name or character, as happens on transitions.
+    """
+    rng = np.random.default_rng(seed)
+    names = player_names(n_players)
+    matchups = [
+        (names[a], CHARACTERS[rng.integers(6)], names[b], CHARACTERS[rng.integers(6)])
+        for a, b in (rng.choice(n_players, size=2, replace=False) for _ in range(n_matchups))
+    ]
+
+    rows = []
+    frames_per_matchup = max(1, n_rows // n_matchups)
+    for i in range(n_rows):
+        p1_name, p1_char, p2_name, p2_char = matchups[min(i // frames_per_matchup, n_matchups - 1)]
+        if rng.random() < noise:
+            p1_name = p1_name[:rng.integers(0, len(p1_name))]
+            p1_char = "Unknown"
+        if rng.random() < noise:
+            p2_char = CHARACTERS[rng.integers(6)] if rng.random() < 0.5 else "Unknown"
+        rows.append({
+            "frame": f"frames_folder/frame_{(i + 1) * 2000}.jpg",
+            "player_1_name": p1_name,
+            "player_1_character": p1_char,
+            "player_2_name": p2_name,
+            "player_2_character": p2_char,
+        })
+    return pd.DataFrame(rows)
+
+def render_overlay_frame(p1_name, p1_char, p2_name, p2_char, roi_profile="tlg_720p", seed=0):
+    """A BGR frame with the names and characters drawn into the ROI profile's boxes"""
+    import cv2
+    from ocr_for_tla import ROI_PROFILES
+
+    profile = ROI_PROFILES[roi_profile]
+    rng = np.random.default_rng(seed)
+    # Busy background so preprocessing has something to work through
+    frame = rng.integers(0, 90, size=(profile["height"], profile["width"], 3), dtype=np.uint8)
+
+    texts = {
+        "player_1_name": p1_name,
+        "player_2_name": p2_name,
+        "player_1_character": p1_char,
+        "player_2_character": p2_char,
+    }
+    for key, roi in {**profile["names"], **profile["characters"]}.items():
+        x, y, w, h = roi
+        frame[y:y + h, x:x + w] = 20
+        scale = h / 40
+        (text_w, _), _ = cv2.getTextSize(texts[key], cv2.FONT_HERSHEY_SIMPLEX, scale, 1)
+        if text_w > w:
+            scale *= w / text_w
+        cv2.putText(frame, texts[key], (x + 1, y + h - 4), cv2.FONT_HERSHEY_SIMPLEX, scale, (255, 255, 255), 1, cv2.LINE_AA)
+    return frame
+
+def generate_overlay_frames(n_frames=50, n_players=400, seed=0):
+    """Yield (expected_info, frame) pairs so OCR accuracy can be checked alongside speed"""
+    rng = np.random.default_rng(seed)
+    names = player_names(n_players)
+    for i in range(n_frames):
+        p1, p2 = rng.choice(n_players, size=2, replace=False)
+        expected = {
+            "player_1_name": names[p1],
+            "player_1_character": CHARACTERS[rng.integers(6)],
+            "player_2_name": names[p2],
+            "player_2_character": CHARACTERS[rng.integers(6)],
+        }
+        frame = render_overlay_frame(
+            expected["player_1_name"], expected["player_1_character"],
+            expected["player_2_name"], expected["player_2_character"],
+            seed=seed + i,
+        )
+        yield expected, frame
+
+def write_overlay_video(path, n_frames=200, frame_interval=20, fps=60, seed=0):
+    """Write a local video for pipelined_ingest, changing overlay every frame_interval frames"""
+    import cv2
+
+    writer = None
+    frame = None
+    overlays = generate_overlay_frames(n_frames // frame_interval + 1, seed=seed)
+    for i in range(n_frames):
+        if i % frame_interval == 0:
+            _, frame = next(overlays)
+            if writer is None:
+                height, width = frame.shape[:2]
+                writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+        writer.write(frame)
+    if writer is not None:
+        writer.release()
+    return path
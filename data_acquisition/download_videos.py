@@ -1,8 +1,29 @@
 """
 To be updated to include a sample of TLGs, majors, Roundhorsin
+
+Two modes:
+* download_videos saves full MP4s for manual frame extraction
+* pipelined_ingest streams video only, at the lowest resolution the ROI profile
+  supports, and OCRs sampled frames while the rest of the video is still loading
 """
+import os
+import csv
+import queue
+import threading
+import cv2
 import yt_dlp as youtube_dl
 
+from ocr_for_tla import ROI_PROFILES, DEFAULT_ROI_PROFILE, extract_player_info_from_image
+
+# OCR only needs one frame in every FRAME_INTERVAL
+FRAME_INTERVAL = 2000
+# Each queued 720p frame is ~2.7MB, so this caps decoded frames held in memory
+FRAME_QUEUE_SIZE = 8
+OCR_WORKERS = 4
+
+FIELDNAMES = ["frame", "player_1_name", "player_1_character", "player_2_name", "player_2_character"]
+
+
 def download_videos(urls, output_dir):
     ydl_opts = {
         'outtmpl': f'{output_dir}/%(title)s.%(ext)s',
@@ -12,10 +33,188 @@ def download_videos(urls, output_dir):
     with youtube_dl.YoutubeDL(ydl_opts) as ydl:
         ydl.download(urls)
 
-urls = [
-    'https://www.youtube.com/watch?v=gqHPRuo8Gmo',
-    # Add more URLs here
-]
+def resolve_stream_url(source, roi_profile=DEFAULT_ROI_PROFILE):
+    """Return something cv2.VideoCapture can open: local paths pass straight through"""
+    if os.path.exists(source):
+        return source
+
+    # Video only ('bv'/'wv' without '*' exclude formats muxed with audio). With format_sort
+    # '+res', 'bv' picks the smallest matching stream and 'wv' the largest. So in order of preference:
+    # * the smallest stream at least as tall as the ROI profile
+    # * if the VOD never reaches that height (the VOD lookup accepts 480p), the tallest stream it has,
+    #   since frames are resized to the profile's size before cropping anyway
+    # Each step prefers H.264 (avc1), which OpenCV's ffmpeg build can always decode,
+    # over the AV1/VP9 streams yt-dlp would otherwise rank first
+    height = ROI_PROFILES[roi_profile]["height"]
+    ydl_opts = {
+        'quiet': True,
+        'format': (f'bv[height>={height}][vcodec^=avc1]/bv[height>={height}]/'
+                   'wv[vcodec^=avc1]/wv'),
+        'format_sort': ['+res'],
+    }
+    with youtube_dl.YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(source, download=False)
+    return info['url']
+
+def decode_frames(stream_url, frame_queue, result_queue, stop_event, frame_interval=FRAME_INTERVAL,
+                  num_workers=OCR_WORKERS):
+    """
+    Put every frame_interval-th frame on frame_queue, then one None per worker.
+
+    Errors are put on result_queue for pipelined_ingest to raise, since they
+    can't propagate out of the thread.
+    """
+    capture = cv2.VideoCapture(stream_url)
+    try:
+        if not capture.isOpened():
+            raise IOError(f"Could not open video stream: {stream_url}")
+
+        frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        index = frame_interval
+        while not stop_event.is_set():
+            if frame_count > 0:
+                # Seeking lets ffmpeg range-request past the footage we don't need
+                if index >= frame_count:
+                    break
+                capture.set(cv2.CAP_PROP_POS_FRAMES, index)
+            else:
+                # Unknown length (live or unseekable): step through without converting frames
+                skipped = 0
+                while skipped < frame_interval - 1 and capture.grab():
+                    skipped += 1
+                if skipped < frame_interval - 1:
+                    break
+
+            ok, frame = capture.read()
+            if not ok:
+                # Before the known end this is a dropped stream, and a short CSV mustn't look complete.
+                # CAP_PROP_FRAME_COUNT is estimated from duration and fps, so the last sample is let off
+                if frame_count > 0 and index + frame_interval < frame_count:
+                    raise IOError(f"Could not read frame {index} of {frame_count} from {stream_url}")
+                break
+            # Blocks while OCR is behind, which is what bounds memory
+            frame_queue.put((index, frame))
+            index += frame_interval
+    except Exception as e:
+        result_queue.put(e)
+    finally:
+        capture.release()
+        for _ in range(num_workers):
+            frame_queue.put(None)
+
+def ocr_worker(frame_queue, result_queue, stop_event, roi_profile, label):
+    """OCR frames until a None arrives or stop_event is set, then put one None on result_queue"""
+    try:
+        while not stop_event.is_set():
+            try:
+                item = frame_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is None:
+                break
+            index, frame = item
+            frame_label = f"{label}#frame_{index}"
+            try:
+                player_info = extract_player_info_from_image(frame, roi_profile, label=frame_label)
+            except Exception as e:
+                # Passed on for pipelined_ingest to raise, like decoder errors
+                result_queue.put(e)
+                continue
+            result_queue.put((index, frame_label, player_info))
+    finally:
+        result_queue.put(None)
+
+def pipelined_ingest(source, output_csv, roi_profile=DEFAULT_ROI_PROFILE, frame_interval=FRAME_INTERVAL,
+                     num_workers=OCR_WORKERS, queue_size=FRAME_QUEUE_SIZE):
+    """
+    Stream a video (YouTube URL or local file) straight into OCR.
+
+    Decoding runs on one thread and OCR on num_workers threads, connected by a
+    queue of at most queue_size frames. Rows are written to output_csv as they
+    finish, so the file is in completion order rather than frame order.
+    Raises if the stream can't be opened, decoding fails part way through, OCR
+    can't run (e.g. tesseract is missing), or no frame gave any OCR output.
+
+    Returns (frames_processed, rows_written). OCR failures count as frames but not
+    rows, so throughput should be measured on frames_processed.
+    """
+    stream_url = resolve_stream_url(source, roi_profile)
+
+    frame_queue = queue.Queue(maxsize=queue_size)
+    result_queue = queue.Queue(maxsize=queue_size)
+    stop_event = threading.Event()
+
+    decoder = threading.Thread(
+        target=decode_frames,
+        args=(stream_url, frame_queue, result_queue, stop_event, frame_interval, num_workers),
+        daemon=True,
+    )
+    workers = [
+        threading.Thread(target=ocr_worker, args=(frame_queue, result_queue, stop_event, roi_profile, source),
+                         daemon=True)
+        for _ in range(num_workers)
+    ]
+    decoder.start()
+    for worker in workers:
+        worker.start()
+
+    frames_processed = 0
+    rows_written = 0
+    finished_workers = 0
+    try:
+        with open(output_csv, 'w', newline='') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=FIELDNAMES)
+            writer.writeheader()
+            while finished_workers < num_workers:
+                result = result_queue.get()
+                if result is None:
+                    finished_workers += 1
+                    continue
+                if isinstance(result, Exception):
+                    raise result
+                _, frame_label, player_info = result
+                frames_processed += 1
+                if player_info:
+                    writer.writerow({"frame": frame_label, **player_info})
+                    rows_written += 1
+    finally:
+        stop_event.set()
+        # If the loop above raised, the decoder or workers may be blocked on a full queue.
+        # Keep both queues moving until every thread has finished, so none are left behind
+        # holding frames when this runs once per tournament.
+        while finished_workers < num_workers or decoder.is_alive():
+            try:
+                frame_queue.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                if result_queue.get(timeout=0.1) is None:
+                    finished_workers += 1
+            except queue.Empty:
+                pass
+        for worker in workers:
+            worker.join()
+
+    # An empty CSV would otherwise look like a finished tournament to run_pipeline
+    if frames_processed and not rows_written:
+        raise RuntimeError(f"OCR failed on all {frames_processed} frames of {source}, see ocr_log.txt")
+
+    return frames_processed, rows_written
+
+
+if __name__ == "__main__":
+    urls = [
+        'https://www.youtube.com/watch?v=gqHPRuo8Gmo',
+        # Add more URLs here
+    ]
+
+    # Set to False to download full videos instead of streaming them into OCR
+    pipelined = True
 
-output_dir = 'output_videos'
-download_videos(urls, output_dir)
+    if pipelined:
+        for i, url in enumerate(urls):
+            frames, rows = pipelined_ingest(url, f'output_{i}.csv')
+            print(f"Wrote {rows} OCR rows from {frames} frames for {url}")
+    else:
+        output_dir = 'output_videos'
+        download_videos(urls, output_dir)
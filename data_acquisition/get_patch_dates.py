@@ -1,77 +1,120 @@
-import time
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+import os
+import re
+import json
+import requests
 from bs4 import BeautifulSoup
 import pandas as pd
 
-
-def get_patch_dates():
-    # URL of the Tough Love Arena log page
-    url = 'https://about.toughlovearena.com/log/'
-
-    # Start a Selenium WebDriver
-    driver = webdriver.Chrome()  # Use the appropriate WebDriver for your browser
-
-    # Open the URL
-    driver.get(url)
-
-    # Wait for the page to load
-    WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.CLASS_NAME, "Changelog_version__zd1GB")))
-
-    # Lists to store the data
-    dates = []
-    patches = []
-
-    # Scroll to the bottom of the page to load more content
-    last_height = driver.execute_script("return document.body.scrollHeight")
-    while True:
-        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(2)  # Wait for some time to load the new content
-        new_height = driver.execute_script("return document.body.scrollHeight")
-        if new_height == last_height:
-            break
-        last_height = new_height
-
-    # Parse the loaded content
-    soup = BeautifulSoup(driver.page_source, 'html.parser')
-
-    # Find all patch entries
-    patch_entries = soup.find_all('div', class_='Changelog_version__zd1GB')
-
-    # Loop through each patch entry and extract the version and date
-    for entry in patch_entries:
-        # Extract the patch number
-        patch_element = entry.find('a', class_='Changelog_patch__J1sLl')
-        if not patch_element:
-            patch_element = entry.find('a', class_='Changelog_minor__YRDzc')
-        if patch_element:
-            patch = patch_element.text.strip()
-            patches.append(patch)
-
-
-        # Extract the date
-        date_element = entry.find('span', class_='Changelog_date__Hhk0J')
-        if date_element:
-            date = date_element.text.strip()
-            dates.append(date)
-
-    # Create a DataFrame with the extracted data
-    df = pd.DataFrame({
-        'date': dates,
-        'patch': patches
-    })
+# URL of the Tough Love Arena log page
+LOG_URL = 'https://about.toughlovearena.com/log/'
+
+# The page uses CSS modules, so class names end in a build hash (e.g. Changelog_version__zd1GB).
+# Match on the stable prefix so a site rebuild doesn't break the scraper.
+VERSION_SELECTOR = '[class*="Changelog_version__"]'
+PATCH_SELECTOR = 'a[class*="Changelog_patch__"], a[class*="Changelog_minor__"]'
+DATE_SELECTOR = 'span[class*="Changelog_date__"]'
+
+# Next.js pages can also carry their data as JSON in <script id="__NEXT_DATA__">, which
+# survives markup changes and client-side rendering. The live page couldn't be fetched when
+# this was written, so the field names are a guess: any object with a version-like
+# 'version'/'patch' and a 'date' is taken as an entry. Both paths are only tested against
+# reconstructed pages in tests/fixtures, not a capture of the real one.
+VERSION_FIELDS = ('version', 'patch')
+VERSION_PATTERN = re.compile(r'^v?\d+(\.\d+)+$')
+
+
+def fetch_log_html(url=LOG_URL):
+    response = requests.get(url, headers={'User-Agent': 'Mozilla/5.0'}, timeout=30)
+    response.raise_for_status()
+    return response.text
+
+def format_date(value):
+    """Dates in the CSV are YYYY/MM/DD, as the page shows them"""
+    try:
+        return pd.to_datetime(value).strftime('%Y/%m/%d')
+    except (ValueError, TypeError):
+        return str(value).strip()
+
+def find_embedded_entries(data):
+    """Walk the __NEXT_DATA__ JSON for objects that look like changelog entries"""
+    entries = []
+    if isinstance(data, dict):
+        version = next((data[key] for key in VERSION_FIELDS
+                        if isinstance(data.get(key), str) and VERSION_PATTERN.match(data[key])), None)
+        if version and data.get('date'):
+            return [(format_date(data['date']), version.lstrip('v'))]
+        data = list(data.values())
+    if isinstance(data, list):
+        for item in data:
+            entries.extend(find_embedded_entries(item))
+    return entries
+
+def parse_patch_entries(html):
+    """
+    Return (date, patch) pairs in page order (newest first).
+
+    Uses the __NEXT_DATA__ JSON when it has entries, otherwise the rendered markup.
+    """
+    soup = BeautifulSoup(html, 'lxml')
+
+    next_data = soup.find('script', id='__NEXT_DATA__')
+    if next_data and next_data.string:
+        try:
+            entries = find_embedded_entries(json.loads(next_data.string))
+        except json.JSONDecodeError:
+            entries = []
+        if entries:
+            return entries
+
+    entries = []
+    for entry in soup.select(VERSION_SELECTOR):
+        patch_element = entry.select_one(PATCH_SELECTOR)
+        date_element = entry.select_one(DATE_SELECTOR)
+        # Keep date and patch paired, unlike separate lists that can drift out of step
+        if patch_element and date_element:
+            entries.append((date_element.text.strip(), patch_element.text.strip()))
+    return entries
+
+def version_key(patch):
+    return tuple(int(part) for part in patch.split('.') if part.isdigit())
+
+def get_patch_dates(output_file='data/raw/tough_love_arena_patches.csv', html=None):
+    """
+    Add any patches newer than the newest one already in output_file.
+
+    Pass html to parse a saved copy of the page instead of fetching it.
+    """
+    if html is None:
+        html = fetch_log_html()
+    entries = parse_patch_entries(html)
+    # The changelog is never empty, so this means the scraper is broken rather than a quiet week
+    if not entries:
+        raise ValueError("No patch entries found on the changelog page - it may now be rendered "
+                         "client-side, or the Changelog_ class prefixes may have changed")
+
+    existing = None
+    if os.path.exists(output_file):
+        existing = pd.read_csv(output_file, dtype=str)
+
+    if existing is not None and not existing.empty:
+        latest = max(version_key(patch) for patch in existing['patch'])
+        entries = [(date, patch) for date, patch in entries if version_key(patch) > latest]
+
+    if not entries:
+        print("No new patches found.")
+        return 0
+
+    df = pd.DataFrame(entries, columns=['date', 'patch'])
+    # File is kept newest first, so new patches go on top
+    if existing is not None:
+        df = pd.concat([df, existing], ignore_index=True)
 
     # Save the DataFrame to a CSV file
-    df.to_csv('tough_love_arena_patches.csv', index=False)
-
-    # Close the WebDriver
-    driver.quit()
+    df.to_csv(output_file, index=False)
 
-    print("Data successfully saved to tough_love_arena_patches.csv")
+    print(f"Added {len(entries)} new patches to {output_file}")
+    return len(entries)
 
 
 if __name__ == "__main__":
     get_patch_dates()
-
@@ -1,7 +1,11 @@
+import os
 import re
 import json
+import datetime
+import threading
 import pandas as pd
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from yt_dlp import YoutubeDL
 
 
@@ -44,47 +48,80 @@ def identify_tournaments(df, coverage_threshold=0.8, top_active_threshold=0.2):
 
 YDL_OPTIONS = {
     'noplaylist': 'True',
+    'quiet': True,
     'format': 'bestvideo[height>=480]+bestaudio/best[height>=480]'
 }
 
-def search_youtube(arg):
-    with YoutubeDL(YDL_OPTIONS) as ydl:
-        try:
-            video = ydl.extract_info(f"ytsearch:{arg}", download=False)['entries'][0]
-        except Exception as e:
-            print(f"An error occurred while searching for '{arg}': {str(e)}")
-            return None
-        
-        # Check if the video is uploaded by 'shygybeats'
-        if video.get('uploader', '').lower() != '` shygybeats `':
-            print(f"Skipping video '{video.get('title')}' - not uploaded by shygybeats")
-            return None
-
-        # Check if 'modded' is in the title
-        if 'modded' in video.get('title', '').lower():
-            print(f"Skipping video '{video.get('title')}' - contains 'modded' in title")
-            return None
-
-        # Check if the video has at least 480p quality
-        formats = video.get('formats', [])
-        has_480p_or_better = any(
-            f.get('height') is not None and f.get('height') >= 480 
-            for f in formats
-        )
-        
-        if not has_480p_or_better:
-            print(f"Skipping video '{video.get('title')}' due to low quality")
-            return None
-
-        # Extract relevant information
-        cleared_data = {
-            'channel': video.get('uploader'),
-            'title': video.get('title'),
-            'video_url': video.get('webpage_url'),
-            'duration': video.get('duration'),
-            'upload_date': video.get('upload_date'),
-        }
-        return cleared_data
+# Skipped tournaments are re-searched once this many days have passed,
+# in case a better upload has appeared since
+NEGATIVE_CACHE_TTL_DAYS = 30
+# VODs usually go up a day or two after the tournament, so misses for
+# tournaments this recent are only trusted for RECENT_MISS_TTL_DAYS
+RECENT_TOURNAMENT_DAYS = 7
+RECENT_MISS_TTL_DAYS = 1
+MAX_WORKERS = 4
+
+
+def check_video(video):
+    """Return the reason a search result is unusable, or None if it is fine"""
+    # Check if the video is uploaded by 'shygybeats'
+    # Fields can be present but None, so fall back to '' rather than relying on .get defaults
+    if (video.get('uploader') or '').lower() != '` shygybeats `':
+        return 'not uploaded by shygybeats'
+
+    # Check if 'modded' is in the title
+    if 'modded' in (video.get('title') or '').lower():
+        return "contains 'modded' in title"
+
+    # Check if the video has at least 480p quality
+    formats = video.get('formats') or []
+    has_480p_or_better = any(
+        f.get('height') is not None and f.get('height') >= 480
+        for f in formats
+    )
+    if not has_480p_or_better:
+        return 'low quality'
+
+    return None
+
+def search_youtube(arg, ydl=None):
+    """
+    Search YouTube for a tournament VOD.
+
+    Returns (video_info, skip_reason). Both are None when the search itself
+    failed, so that transient errors aren't cached as misses.
+    """
+    if ydl is None:
+        with YoutubeDL(YDL_OPTIONS) as ydl:
+            return search_youtube(arg, ydl)
+
+    try:
+        results = ydl.extract_info(f"ytsearch:{arg}", download=False)
+    except Exception as e:
+        print(f"An error occurred while searching for '{arg}': {str(e)}")
+        return None, None
+
+    # No results is a real answer, not a transient failure, so it gets cached like a skip
+    entries = list((results or {}).get('entries') or [])
+    if not entries:
+        print(f"No search results for '{arg}'")
+        return None, 'no search results'
+    video = entries[0]
+
+    skip_reason = check_video(video)
+    if skip_reason:
+        print(f"Skipping video '{video.get('title')}' - {skip_reason}")
+        return None, skip_reason
+
+    # Extract relevant information
+    cleared_data = {
+        'channel': video.get('uploader'),
+        'title': video.get('title'),
+        'video_url': video.get('webpage_url'),
+        'duration': video.get('duration'),
+        'upload_date': video.get('upload_date'),
+    }
+    return cleared_data, None
 
 def format_string(s):
     # Insert space before uppercase letters that are followed by lowercase letters
@@ -93,19 +130,106 @@ def format_string(s):
     s = re.sub(r'(?<=\D)(?=\d)', ' ', s)
     return s
 
-def generate_youtube_info(tournaments):
-    video_info_list = []
-    for tournament in tournaments:
-        # Create search query
-        query = format_string(tournament)
+def load_json(path, default):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+def write_json(path, data):
+    """Write via a temp file so an interrupted run never leaves half a file"""
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+def latest_match_dates(df):
+    """Map each tournament to the time of its last match, in UTC"""
+    dates = pd.to_datetime(df['date'], utc=True).groupby(df['tournament']).max()
+    return {tournament: date.to_pydatetime() for tournament, date in dates.items()}
+
+def miss_ttl(tournament, tournament_dates, now, ttl_days=NEGATIVE_CACHE_TTL_DAYS):
+    """How long a miss is cached for, shorter while the VOD may still be on its way"""
+    played_at = (tournament_dates or {}).get(tournament)
+    if played_at and now - played_at < datetime.timedelta(days=RECENT_TOURNAMENT_DAYS):
+        return datetime.timedelta(days=min(ttl_days, RECENT_MISS_TTL_DAYS))
+    return datetime.timedelta(days=ttl_days)
+
+def pending_tournaments(tournaments, video_info_list, misses, now=None, ttl_days=NEGATIVE_CACHE_TTL_DAYS,
+                        tournament_dates=None):
+    """
+    Tournaments with neither a resolved VOD nor a fresh cached miss.
+
+    tournament_dates ({tournament: datetime}, see latest_match_dates) shortens
+    the cache for recent tournaments; without it every miss lasts ttl_days.
+    """
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    resolved = {video['tournament'] for video in video_info_list}
+    pending = []
+    for tournament in sorted(set(tournaments)):
+        if tournament in resolved:
+            continue
+        miss = misses.get(tournament)
+        if miss:
+            checked_at = datetime.datetime.fromisoformat(miss['checked_at'])
+            if now - checked_at < miss_ttl(tournament, tournament_dates, now, ttl_days):
+                continue
+        pending.append(tournament)
+    return pending
+
+def generate_youtube_info(tournaments, output_file=None, misses_file=None, ydl=None, max_workers=MAX_WORKERS,
+                          tournament_dates=None):
+    """
+    Look up VODs for any tournaments not already resolved or recently skipped.
+    tournament_dates is passed on to pending_tournaments.
+
+    Results are written to output_file/misses_file as each search finishes.
+    Pass ydl to reuse an existing extractor (or a stub in tests).
+    """
+    video_info_list = load_json(output_file, []) if output_file else []
+    misses = load_json(misses_file, {}) if misses_file else {}
+    pending = pending_tournaments(tournaments, video_info_list, misses, tournament_dates=tournament_dates)
+    if not pending:
+        return video_info_list
+
+    lock = threading.Lock()
+
+    def lookup(ydl, tournament):
+        # An unexpected error is treated like a failed search, so it can't abort the other lookups
+        try:
+            video_info, skip_reason = search_youtube(format_string(tournament), ydl)
+        except Exception as e:
+            print(f"An error occurred while looking up '{tournament}': {str(e)}")
+            return
+
+        with lock:
+            if video_info:
+                video_info['tournament'] = tournament
+                video_info_list.append(video_info)
+                # Searches finish in any order, so sort to keep the file stable between runs
+                video_info_list.sort(key=lambda video: video['tournament'])
+                misses.pop(tournament, None)
+                if output_file:
+                    write_json(output_file, video_info_list)
+            elif skip_reason:
+                misses[tournament] = {
+                    'reason': skip_reason,
+                    'checked_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                }
+            if misses_file and (video_info or skip_reason):
+                write_json(misses_file, dict(sorted(misses.items())))
+
+    def run(ydl):
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(lambda t: lookup(ydl, t), pending))
+
+    if ydl is None:
+        with YoutubeDL(YDL_OPTIONS) as ydl:
+            run(ydl)
+    else:
+        run(ydl)
 
-        # Search YouTube
-        video_info = search_youtube(query)
-        
-        if video_info:
-            video_info['tournament'] = tournament
-            video_info_list.append(video_info)
-    
     return video_info_list
 
 
@@ -113,11 +237,11 @@ if __name__ == "__main__":
     df = pd.read_csv('data/raw/matches.csv')
     # tournaments = identify_tournaments(df)
     tournaments = list(set(df['tournament']))
-    youtube_info = generate_youtube_info(tournaments)
 
-    # Save results to a file
+    # Results are saved to these files as they come in
     output_file = 'data/raw/tlg_youtube_urls.json'
-    with open(output_file, 'w') as f:
-        json.dump(youtube_info, f, indent=2)
+    misses_file = 'data/raw/tlg_youtube_misses.json'
+    youtube_info = generate_youtube_info(tournaments, output_file, misses_file,
+                                         tournament_dates=latest_match_dates(df))
 
-    print(f"Results have been saved to {output_file}")
+    print(f"{len(youtube_info)} results have been saved to {output_file}")
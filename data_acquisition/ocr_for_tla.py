@@ -35,22 +35,33 @@ def correct_character_name(ocr_result):
     corrected_name, score = process.extractOne(ocr_result, valid_characters)
     return corrected_name if score > 60 else "Unknown"
 
-def extract_player_info(image_path):
-    try:
-        image = cv2.imread(image_path)
-        extracted_info = {}
-
-        roi_characters = {
+# ROIs for the TLG stream overlay, keyed by the frame height they were measured at.
+# Frames at other resolutions are resized to the profile's size before cropping.
+ROI_PROFILES = {
+    "tlg_720p": {
+        "width": 1280,
+        "height": 720,
+        "characters": {
             "player_1_character": (305, 110, 60, 19),
             "player_2_character": (1096, 109, 60, 22),
-        }
-
-        roi_names = {
-            "player_1_name": (291, 657, 228, 34), 
+        },
+        "names": {
+            "player_1_name": (291, 657, 228, 34),
             "player_2_name": (939, 658, 227, 32),
-        }
+        },
+    },
+}
+DEFAULT_ROI_PROFILE = "tlg_720p"
 
-        for key, roi in roi_names.items():
+def extract_player_info_from_image(image, roi_profile=DEFAULT_ROI_PROFILE, label="frame"):
+    try:
+        profile = ROI_PROFILES[roi_profile]
+        height, width = image.shape[:2]
+        if (width, height) != (profile["width"], profile["height"]):
+            image = cv2.resize(image, (profile["width"], profile["height"]), interpolation=cv2.INTER_AREA)
+        extracted_info = {}
+
+        for key, roi in profile["names"].items():
             preprocessed_roi = preprocess_image(image, roi)
             preprocessed_ocr = preprocess_for_names(preprocessed_roi)
             roi_image = Image.fromarray(preprocessed_ocr)
@@ -58,7 +69,7 @@ def extract_player_info(image_path):
             text = pytesseract.image_to_string(roi_image, config=custom_config)
             extracted_info[key] = text.strip()
 
-        for key, roi in roi_characters.items():
+        for key, roi in profile["characters"].items():
             preprocessed_roi = preprocess_image(image, roi)
             preprocessed_ocr = preprocess_for_characters(preprocessed_roi)
             roi_image = Image.fromarray(preprocessed_ocr)
@@ -68,9 +79,19 @@ def extract_player_info(image_path):
 
         return extracted_info
 
+    # A missing tesseract would fail every frame, so stop rather than log each one
+    except pytesseract.TesseractNotFoundError:
+        raise
     except Exception as e:
-        logging.error(f"Error processing {image_path}: {str(e)}")
+        logging.error(f"Error processing {label}: {str(e)}")
+        return None
+
+def extract_player_info(image_path, roi_profile=DEFAULT_ROI_PROFILE):
+    image = cv2.imread(image_path)
+    if image is None:
+        logging.error(f"Error processing {image_path}: could not read image")
         return None
+    return extract_player_info_from_image(image, roi_profile, label=image_path)
 
 def process_frames(frames_folder, output_csv):
     data = []
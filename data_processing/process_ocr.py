@@ -46,7 +46,9 @@ def clean_and_aggregate_data(csv_file):
             })
 
     # Create a dataframe from the results and sort it
-    result_df = pd.DataFrame(results)
+    # Columns are given so that no qualifying matchups still gives a sortable, empty frame
+    result_df = pd.DataFrame(results, columns=['player_1_name', 'player_1_character', 'player_2_name',
+                                               'player_2_character', 'occurrence'])
     result_df = result_df.sort_values('occurrence', ascending=False)
 
     return result_df
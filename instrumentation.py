@@ -0,0 +1,194 @@
+"""
+Lightweight timing, counters and profiling for pipeline stages and benchmarks.
+
+Every stage is wrapped in RunReport.stage(), which records wall time, CPU time,
+peak RSS and any counters, and can optionally write a cProfile dump or
+collapsed stacks from a sampling profiler (loadable by flamegraph.pl/speedscope).
+The report is written as JSON so runs can be compared across changes.
+"""
+import os
+import sys
+import json
+import time
+import cProfile
+import datetime
+import platform
+import subprocess
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def maxrss_mb(maxrss):
+    # ru_maxrss is KB on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(maxrss / scale, 1)
+
+def peak_rss_mb():
+    """Peak resident memory of this process and any finished children, in MB"""
+    if resource is None:
+        return None
+    self_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    child_peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return maxrss_mb(max(self_peak, child_peak))
+
+def run_subprocess(metrics, args, **kwargs):
+    """
+    Run args like subprocess.run(check=True), recording the child's own CPU time and peak RSS.
+
+    wait4 gives the usage of exactly this child, where a RUSAGE_CHILDREN delta would
+    also pick up any other subprocess stage that finished in the meantime.
+    """
+    process = subprocess.Popen(args, **kwargs)
+    if not hasattr(os, 'wait4'):  # Windows
+        process.wait()
+    else:
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        metrics['cpu_seconds'] = round(usage.ru_utime + usage.ru_stime, 4)
+        metrics['cpu_scope'] = 'subprocess'
+        metrics['peak_rss_mb'] = maxrss_mb(usage.ru_maxrss)
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, args)
+
+
+class StackSampler:
+    """Samples every thread's stack on an interval, py-spy style, into collapsed-stack counts"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+                    frame = frame.f_back
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f'{stack} {count}\n')
+
+
+class RunReport:
+    """
+    Collects per-stage metrics for one run.
+
+    profile is None, 'cprofile' or 'sample'; profile output goes to profile_dir.
+    trace_memory adds a tracemalloc peak per stage, at a noticeable speed cost.
+
+    cpu_seconds comes from the child for stages that use run_subprocess (cpu_scope
+    'subprocess'). Otherwise it is this whole process's CPU over the stage (cpu_scope
+    'process'), so it includes any other stage running at the same time and is only a
+    per-stage figure when stages run one at a time.
+    """
+
+    def __init__(self, name, profile=None, profile_dir='profiles', trace_memory=False):
+        if profile not in (None, 'cprofile', 'sample'):
+            raise ValueError(f"Unknown profile mode '{profile}'")
+        self.name = name
+        self.profile = profile
+        self.profile_dir = profile_dir
+        self.trace_memory = trace_memory
+        self.started_at = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block; yields a dict to add counters to via count()"""
+        metrics = {'counters': Counter(), 'status': 'ok'}
+        profiler = None
+        if self.profile:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            profiler = cProfile.Profile() if self.profile == 'cprofile' else StackSampler()
+            if self.profile == 'cprofile':
+                profiler.enable()
+            else:
+                profiler.start()
+        if self.trace_memory:
+            tracemalloc.start()
+
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield metrics
+        except BaseException:
+            metrics['status'] = 'failed'
+            raise
+        finally:
+            metrics['wall_seconds'] = round(time.perf_counter() - wall_start, 4)
+            if 'cpu_seconds' not in metrics:
+                metrics['cpu_seconds'] = round(time.process_time() - cpu_start, 4)
+                metrics['cpu_scope'] = 'process'
+                metrics['peak_rss_mb'] = peak_rss_mb()
+            if self.trace_memory:
+                metrics['traced_peak_mb'] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+                tracemalloc.stop()
+
+            if profiler is not None:
+                safe_name = name.replace(':', '_').replace('/', '_')
+                if self.profile == 'cprofile':
+                    profiler.disable()
+                    profile_path = os.path.join(self.profile_dir, f'{safe_name}.prof')
+                    profiler.dump_stats(profile_path)
+                else:
+                    profiler.stop()
+                    profile_path = os.path.join(self.profile_dir, f'{safe_name}.collapsed')
+                    profiler.write(profile_path)
+                metrics['profile'] = profile_path
+
+            # Turn counters into rates so throughput can be compared directly
+            counters = dict(metrics.pop('counters'))
+            metrics['counters'] = counters
+            if metrics['wall_seconds'] > 0:
+                metrics['rates_per_second'] = {
+                    key: round(value / metrics['wall_seconds'], 2) for key, value in counters.items()
+                }
+            with self._lock:
+                self.stages[name] = metrics
+
+    def to_dict(self):
+        with self._lock:
+            stages = dict(self.stages)
+        return {
+            'name': self.name,
+            'started_at': self.started_at,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'stages': stages,
+        }
+
+    def write(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+def count(metrics, key, n=1):
+    """Add n to a counter on the metrics dict yielded by RunReport.stage()"""
+    metrics['counters'][key] += n
@@ -0,0 +1,358 @@
+"""
+Runs the data pipeline as a DAG of stages with declared inputs and outputs.
+
+A stage is skipped when the hashes of its inputs and code match the last
+successful run and its outputs still exist. Stages whose dependencies are
+done run in parallel, so ratings don't wait on the VOD/OCR branch.
+Partitioned stages track each tournament separately, so a new TLG is the
+only thing that flows through OCR on a weekly run. A failed partition is
+reported and retried next run, while dependents carry on with the rest.
+
+Timings, counters and peak memory for every stage that runs are saved to
+reports/ as JSON (see instrumentation.py).
+
+Usage: python run_pipeline.py [stage ...] [--force] [--profile cprofile|sample] [--trace-memory]
+"""
+import os
+import sys
+import json
+import glob
+import hashlib
+import csv
+import argparse
+import threading
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from instrumentation import RunReport, count, run_subprocess
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+RAW_DIR = os.path.join(ROOT, 'data', 'raw')
+OCR_DIR = os.path.join(ROOT, 'data', 'ocr')
+STATE_FILE = os.path.join(ROOT, 'data', '.pipeline_state.json')
+REPORT_DIR = os.path.join(ROOT, 'reports')
+MAX_WORKERS = 4
+
+# Partitioned stages import the scripts' functions directly, the same way they import each other
+sys.path[:0] = [os.path.join(ROOT, 'data_acquisition'), os.path.join(ROOT, 'data_processing')]
+
+
+@dataclass
+class Stage:
+    name: str
+    code: list
+    inputs: list = field(default_factory=list)
+    outputs: list = field(default_factory=list)
+    deps: list = field(default_factory=list)
+    # Stages that pull from an external source (Challonge, the TLA site, YouTube) can't be hashed, so always run
+    always_run: bool = False
+    script: str = None
+    # For script stages: a CSV or JSON list whose length after the run is recorded as count_label
+    count_file: str = None
+    # For partitioned stages: partitions() returns {key: bytes identifying that partition's input},
+    # run_partition(key) processes one and returns how many items it handled (recorded as
+    # count_label in the run report), and partition_outputs(key) lists what it writes
+    partitions: object = None
+    run_partition: object = None
+    partition_outputs: object = None
+    count_label: str = 'items'
+
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+def hash_files(paths):
+    """Hash repo-relative paths and their contents, so moving the checkout changes nothing"""
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(path.encode())
+        full_path = os.path.join(ROOT, path)
+        if os.path.exists(full_path):
+            with open(full_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(chunk)
+        else:
+            digest.update(b'<missing>')
+    return digest.hexdigest()
+
+def load_state(path=STATE_FILE):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def save_state(state, path=STATE_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def run_script(metrics, script):
+    run_subprocess(metrics, [sys.executable, os.path.join(ROOT, script)], cwd=ROOT)
+
+def count_items(path):
+    """Rows in a CSV (excluding the header) or entries in a JSON list"""
+    full_path = os.path.join(ROOT, path)
+    if not os.path.exists(full_path):
+        return 0
+    with open(full_path, 'r', newline='') as f:
+        if path.endswith('.json'):
+            return len(json.load(f))
+        return max(sum(1 for _ in csv.reader(f)) - 1, 0)
+
+
+# Partitioned stages, one partition per tournament with a VOD
+
+def load_vods():
+    try:
+        with open(os.path.join(RAW_DIR, 'tlg_youtube_urls.json'), 'r') as f:
+            return {video['tournament']: video for video in json.load(f)}
+    except FileNotFoundError:
+        return {}
+
+def ocr_partitions():
+    return {tournament: json.dumps(video, sort_keys=True).encode() for tournament, video in load_vods().items()}
+
+def ocr_output(tournament):
+    return os.path.join(OCR_DIR, f'{tournament}.csv')
+
+def run_ocr(tournament):
+    from download_videos import pipelined_ingest
+    os.makedirs(OCR_DIR, exist_ok=True)
+    # Only a finished CSV gets the real name, so ocr_matchups never picks up a failed run's partial output
+    tmp_path = f'{ocr_output(tournament)}.tmp'
+    frames_processed, _ = pipelined_ingest(load_vods()[tournament]['video_url'], tmp_path)
+    os.replace(tmp_path, ocr_output(tournament))
+    return frames_processed
+
+def matchup_partitions():
+    partitions = {}
+    for path in glob.glob(os.path.join(OCR_DIR, '*.csv')):
+        tournament = os.path.basename(path)[:-len('.csv')]
+        if tournament.endswith('_matchups'):
+            continue
+        with open(path, 'rb') as f:
+            partitions[tournament] = f.read()
+    return partitions
+
+def matchup_output(tournament):
+    return os.path.join(OCR_DIR, f'{tournament}_matchups.csv')
+
+def run_matchups(tournament):
+    from process_ocr import clean_and_aggregate_data
+    cleaned_data = clean_and_aggregate_data(ocr_output(tournament))
+    cleaned_data.to_csv(matchup_output(tournament), index=False)
+    return len(cleaned_data)
+
+
+STAGES = [
+    Stage(
+        name='base_data',
+        script='data_acquisition/generate_base_data.py',
+        code=['data_acquisition/generate_base_data.py'],
+        outputs=['data/raw/matches.csv', 'data/raw/tla_players.json'],
+        always_run=True,
+        count_file='data/raw/matches.csv',
+        count_label='matches',
+    ),
+    Stage(
+        name='patch_dates',
+        script='data_acquisition/get_patch_dates.py',
+        code=['data_acquisition/get_patch_dates.py'],
+        outputs=['data/raw/tough_love_arena_patches.csv'],
+        always_run=True,
+        count_file='data/raw/tough_love_arena_patches.csv',
+        count_label='patches',
+    ),
+    Stage(
+        name='ratings',
+        script='analysis/generate_ratings.py',
+        code=['analysis/generate_ratings.py'],
+        inputs=['data/raw/matches.csv'],
+        outputs=['analysis/elo_ratings_plot.png'],
+        deps=['base_data'],
+        count_file='data/raw/matches.csv',
+        count_label='matches',
+    ),
+    Stage(
+        name='youtube_urls',
+        script='data_acquisition/minimum_tournament_list.py',
+        code=['data_acquisition/minimum_tournament_list.py'],
+        inputs=['data/raw/matches.csv'],
+        outputs=['data/raw/tlg_youtube_urls.json', 'data/raw/tlg_youtube_misses.json'],
+        deps=['base_data'],
+        # The script only looks up tournaments it hasn't resolved, and retries misses once their
+        # cache entry expires, which needs a run even when matches.csv hasn't changed
+        always_run=True,
+        count_file='data/raw/tlg_youtube_urls.json',
+        count_label='videos',
+    ),
+    Stage(
+        name='ocr',
+        code=['data_acquisition/download_videos.py', 'data_acquisition/ocr_for_tla.py'],
+        deps=['youtube_urls'],
+        partitions=ocr_partitions,
+        run_partition=run_ocr,
+        partition_outputs=lambda tournament: [ocr_output(tournament)],
+        count_label='frames',
+    ),
+    Stage(
+        name='ocr_matchups',
+        code=['data_processing/process_ocr.py'],
+        deps=['ocr'],
+        partitions=matchup_partitions,
+        run_partition=run_matchups,
+        partition_outputs=lambda tournament: [matchup_output(tournament)],
+        count_label='matchups',
+    ),
+]
+
+
+def resolve_targets(stages, targets):
+    """Return the named stages plus everything they depend on"""
+    by_name = {stage.name: stage for stage in stages}
+    selected = set()
+
+    def visit(name):
+        if name not in by_name:
+            raise ValueError(f"Unknown stage '{name}'")
+        if name in selected:
+            return
+        selected.add(name)
+        for dep in by_name[name].deps:
+            visit(dep)
+
+    for name in targets or by_name:
+        visit(name)
+    return [stage for stage in stages if stage.name in selected]
+
+def is_fresh(fingerprint, previous, outputs):
+    return (previous == fingerprint and
+            all(os.path.exists(os.path.join(ROOT, path)) for path in outputs))
+
+def execute_stage(stage, state, lock, report, force=False, state_file=STATE_FILE):
+    """
+    Run (or skip) one stage, recording fingerprints for whatever succeeded.
+
+    Returns the keys of any partitions that failed. These don't fail the stage, so
+    one dead VOD can't hold back every other tournament's dependents.
+    """
+    code_hash = hash_files(stage.code)
+
+    if stage.partitions is None:
+        fingerprint = hash_bytes((code_hash + hash_files(stage.inputs)).encode())
+        with lock:
+            previous = state.get(stage.name)
+        if not force and not stage.always_run and is_fresh(fingerprint, previous, stage.outputs):
+            print(f"[{stage.name}] up to date")
+            return []
+        print(f"[{stage.name}] running")
+        with report.stage(stage.name) as metrics:
+            run_script(metrics, stage.script)
+            if stage.count_file:
+                count(metrics, stage.count_label, count_items(stage.count_file))
+        with lock:
+            state[stage.name] = fingerprint
+            save_state(state, state_file)
+        return []
+
+    partitions = stage.partitions()
+    ran = 0
+    failed = []
+    for key, partition_input in sorted(partitions.items()):
+        state_key = f'{stage.name}:{key}'
+        fingerprint = hash_bytes((code_hash + hash_bytes(partition_input)).encode())
+        with lock:
+            previous = state.get(state_key)
+        if not force and is_fresh(fingerprint, previous, stage.partition_outputs(key)):
+            continue
+        print(f"[{stage.name}] running {key}")
+        ran += 1
+        # A failed partition keeps no fingerprint, so it is retried next run
+        try:
+            with report.stage(state_key) as metrics:
+                count(metrics, stage.count_label, stage.run_partition(key) or 0)
+        except Exception as e:
+            print(f"[{stage.name}] {key} failed: {e}")
+            failed.append(key)
+            continue
+        with lock:
+            state[state_key] = fingerprint
+            save_state(state, state_file)
+    print(f"[{stage.name}] {ran} of {len(partitions)} partitions run, {len(failed)} failed")
+    return failed
+
+def run_pipeline(targets=None, force=False, stages=STAGES, max_workers=MAX_WORKERS, report=None,
+                 state_file=STATE_FILE):
+    """
+    Run the target stages; metrics go to report and fingerprints to state_file.
+
+    Returns (done, failed, failed_partitions): stage names that finished and that
+    failed or were skipped, plus {stage: [partition keys]} for partitions that
+    failed inside otherwise finished stages.
+    """
+    stages = resolve_targets(stages, targets)
+    report = report or RunReport('pipeline')
+    # cProfile and tracemalloc are process-wide, so profiled stages can't overlap
+    if report.profile or report.trace_memory:
+        max_workers = 1
+    state = load_state(state_file)
+    lock = threading.Lock()
+
+    pending = {stage.name: stage for stage in stages}
+    done, failed = set(), set()
+    failed_partitions = {}
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            for name, stage in list(pending.items()):
+                if any(dep in failed for dep in stage.deps):
+                    print(f"[{name}] skipped, a dependency failed")
+                    failed.add(name)
+                    del pending[name]
+                elif all(dep in done for dep in stage.deps):
+                    running[executor.submit(execute_stage, stage, state, lock, report, force, state_file)] = name
+                    del pending[name]
+
+            if not running:
+                if pending:
+                    raise ValueError(f"Dependency cycle between stages: {', '.join(pending)}")
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                try:
+                    stage_failures = future.result()
+                    done.add(name)
+                    if stage_failures:
+                        failed_partitions[name] = stage_failures
+                except Exception as e:
+                    print(f"[{name}] failed: {e}")
+                    failed.add(name)
+
+    return done, failed, failed_partitions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the TLA match data pipeline")
+    parser.add_argument('stages', nargs='*', help="Stages to run, with their dependencies (default: all)")
+    parser.add_argument('--force', action='store_true', help="Run stages even if their inputs haven't changed")
+    parser.add_argument('--profile', choices=['cprofile', 'sample'], help="Profile each stage (runs stages one at a time)")
+    parser.add_argument('--trace-memory', action='store_true', help="Record tracemalloc peaks per stage")
+    args = parser.parse_args()
+
+    report = RunReport('pipeline', profile=args.profile, profile_dir=os.path.join(REPORT_DIR, 'profiles'),
+                       trace_memory=args.trace_memory)
+    try:
+        _, failed, failed_partitions = run_pipeline(args.stages, args.force, report=report)
+        for name, keys in failed_partitions.items():
+            print(f"[{name}] failed partitions: {', '.join(keys)}")
+    finally:
+        report_path = os.path.join(REPORT_DIR, f"pipeline_{report.started_at[:19].replace(':', '-')}.json")
+        report.write(report_path)
+        print(f"Run report saved to {report_path}")
+    sys.exit(1 if failed or failed_partitions else 0)
@@ -0,0 +1,9 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(ROOT, 'tests', 'fixtures')
+
+# The scripts import each other as siblings, so tests import them the same way
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'data_acquisition'), os.path.join(ROOT, 'data_processing'),
+                os.path.join(ROOT, 'benchmarks')]
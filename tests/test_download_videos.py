@@ -0,0 +1,138 @@
+import csv
+import importlib
+import queue
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('cv2')
+pytest.importorskip('yt_dlp')
+pytest.importorskip('pytesseract')
+pytest.importorskip('fuzzywuzzy')
+
+import synthetic
+
+FRAME_INTERVAL = 20
+N_FRAMES = 200
+# Sampled frames are 20, 40, ... 180
+EXPECTED_FRAMES = N_FRAMES // FRAME_INTERVAL - 1
+
+PLAYER_INFO = {
+    "player_1_name": "Player0001",
+    "player_1_character": "Rice",
+    "player_2_name": "Player0002",
+    "player_2_character": "Pork",
+}
+
+
+@pytest.fixture
+def download_videos(tmp_path, monkeypatch):
+    # ocr_for_tla opens ocr_log.txt in the working directory on import
+    monkeypatch.chdir(tmp_path)
+    return importlib.import_module('download_videos')
+
+@pytest.fixture
+def video_path(tmp_path):
+    return synthetic.write_overlay_video(
+        str(tmp_path / 'overlay.mp4'), n_frames=N_FRAMES, frame_interval=FRAME_INTERVAL)
+
+def fake_ocr(delay=0):
+    def extract(frame, roi_profile, label=None):
+        time.sleep(delay)
+        return dict(PLAYER_INFO)
+    return extract
+
+
+def test_pipelined_ingest_local_video(download_videos, video_path, tmp_path, monkeypatch):
+    monkeypatch.setattr(download_videos, 'extract_player_info_from_image', fake_ocr())
+    output_csv = tmp_path / 'output.csv'
+
+    frames, rows = download_videos.pipelined_ingest(video_path, str(output_csv), frame_interval=FRAME_INTERVAL)
+
+    assert (frames, rows) == (EXPECTED_FRAMES, EXPECTED_FRAMES)
+    with open(output_csv, newline='') as f:
+        written = list(csv.DictReader(f))
+    assert sorted(int(row['frame'].split('#frame_')[1]) for row in written) == \
+        list(range(FRAME_INTERVAL, N_FRAMES, FRAME_INTERVAL))
+
+def test_pipelined_ingest_bounds_frame_queue(download_videos, video_path, tmp_path, monkeypatch):
+    created = []
+
+    class RecordingQueue(queue.Queue):
+        def __init__(self, maxsize=0):
+            super().__init__(maxsize)
+            self.largest = 0
+            created.append(self)
+
+        def _put(self, item):
+            super()._put(item)
+            self.largest = max(self.largest, self._qsize())
+
+    monkeypatch.setattr(download_videos.queue, 'Queue', RecordingQueue)
+    # Slow OCR, so the decoder runs ahead until the queue pushes back
+    monkeypatch.setattr(download_videos, 'extract_player_info_from_image', fake_ocr(delay=0.05))
+
+    download_videos.pipelined_ingest(video_path, str(tmp_path / 'output.csv'), frame_interval=FRAME_INTERVAL,
+                                     num_workers=1, queue_size=2)
+
+    frame_queue = created[0]
+    assert frame_queue.largest == 2
+
+def test_pipelined_ingest_bad_path_raises(download_videos, tmp_path):
+    bad_video = tmp_path / 'bad.mp4'
+    bad_video.write_bytes(b'not a video')
+
+    with pytest.raises(IOError):
+        download_videos.pipelined_ingest(str(bad_video), str(tmp_path / 'output.csv'))
+
+def test_pipelined_ingest_raises_when_ocr_gives_nothing(download_videos, video_path, tmp_path, monkeypatch):
+    monkeypatch.setattr(download_videos, 'extract_player_info_from_image', lambda *args, **kwargs: None)
+
+    with pytest.raises(RuntimeError):
+        download_videos.pipelined_ingest(video_path, str(tmp_path / 'output.csv'), frame_interval=FRAME_INTERVAL)
+
+def test_pipelined_ingest_raises_on_dropped_stream(download_videos, video_path, tmp_path, monkeypatch):
+    real_capture = download_videos.cv2.VideoCapture
+
+    class DroppingCapture:
+        """Reports a long video but stops returning frames after the second read"""
+        def __init__(self, path):
+            self.capture = real_capture(path)
+            self.reads = 0
+
+        def isOpened(self):
+            return self.capture.isOpened()
+
+        def get(self, prop):
+            return 10000 if prop == download_videos.cv2.CAP_PROP_FRAME_COUNT else self.capture.get(prop)
+
+        def set(self, prop, value):
+            return True
+
+        def read(self):
+            self.reads += 1
+            return self.capture.read() if self.reads <= 2 else (False, None)
+
+        def release(self):
+            self.capture.release()
+
+    monkeypatch.setattr(download_videos.cv2, 'VideoCapture', DroppingCapture)
+    monkeypatch.setattr(download_videos, 'extract_player_info_from_image', fake_ocr())
+
+    with pytest.raises(IOError):
+        download_videos.pipelined_ingest(video_path, str(tmp_path / 'output.csv'), frame_interval=FRAME_INTERVAL)
+
+def test_pipelined_ingest_stops_threads_on_error(download_videos, video_path, tmp_path, monkeypatch):
+    def failing_ocr(frame, roi_profile, label=None):
+        time.sleep(0.01)
+        raise RuntimeError("OCR crashed")
+
+    monkeypatch.setattr(download_videos, 'extract_player_info_from_image', failing_ocr)
+    threads_before = threading.active_count()
+
+    with pytest.raises(RuntimeError):
+        download_videos.pipelined_ingest(video_path, str(tmp_path / 'output.csv'), frame_interval=FRAME_INTERVAL,
+                                         queue_size=1)
+
+    assert threading.active_count() == threads_before
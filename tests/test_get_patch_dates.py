@@ -0,0 +1,84 @@
+import os
+
+import pandas as pd
+import pytest
+
+from conftest import FIXTURES_DIR
+from get_patch_dates import get_patch_dates, parse_patch_entries
+
+# Newest first, as on the page
+FIXTURE_ENTRIES = [
+    ('2024/05/14', '0.109.2'),
+    ('2024/04/16', '0.109.1'),
+    ('2024/04/08', '0.109.0'),
+    ('2024/04/04', '0.108.4'),
+    ('2024/04/03', '0.108.3'),
+    ('2024/04/02', '0.108.2'),
+    ('2024/04/02', '0.108.1'),
+]
+
+
+@pytest.fixture
+def log_html():
+    with open(os.path.join(FIXTURES_DIR, 'tough_love_arena_log.html'), 'r') as f:
+        return f.read()
+
+def write_patches(path, entries):
+    pd.DataFrame(entries, columns=['date', 'patch']).to_csv(path, index=False)
+
+def read_patches(path):
+    return list(pd.read_csv(path, dtype=str).itertuples(index=False, name=None))
+
+
+def test_parse_patch_entries(log_html):
+    assert parse_patch_entries(log_html) == FIXTURE_ENTRIES
+
+def test_parse_patch_entries_ignores_class_hashes(log_html):
+    # A site rebuild changes the hash suffixes but not the prefixes
+    rehashed = (log_html.replace('__zd1GB', '__aB3dE')
+                        .replace('__J1sLl', '__xY9zQ')
+                        .replace('__YRDzc', '__mN4pR')
+                        .replace('__Hhk0J', '__kL7wS'))
+    assert parse_patch_entries(rehashed) == FIXTURE_ENTRIES
+
+def test_parse_patch_entries_next_data():
+    # Same entries, but only in the __NEXT_DATA__ JSON with an empty body, as if rendered client-side
+    with open(os.path.join(FIXTURES_DIR, 'tough_love_arena_log_next_data.html'), 'r') as f:
+        assert parse_patch_entries(f.read()) == FIXTURE_ENTRIES
+
+def test_parse_patch_entries_falls_back_to_markup(log_html):
+    # Embedded data without changelog entries, or that won't parse, leaves the markup to be scraped
+    for script in ('{"props": {"pageProps": {}}}', '{"props": '):
+        tag = f'<script id="__NEXT_DATA__" type="application/json">{script}</script>'
+        html = log_html.replace('</body>', f'{tag}</body>')
+        assert parse_patch_entries(html) == FIXTURE_ENTRIES
+
+def test_get_patch_dates_nothing_new(tmp_path, log_html):
+    output_file = tmp_path / 'patches.csv'
+    write_patches(output_file, FIXTURE_ENTRIES)
+
+    assert get_patch_dates(output_file=str(output_file), html=log_html) == 0
+    assert read_patches(output_file) == FIXTURE_ENTRIES
+
+def test_get_patch_dates_prepends_newer(tmp_path, log_html):
+    output_file = tmp_path / 'patches.csv'
+    write_patches(output_file, FIXTURE_ENTRIES[4:])
+
+    assert get_patch_dates(output_file=str(output_file), html=log_html) == 4
+    assert read_patches(output_file) == FIXTURE_ENTRIES
+
+def test_get_patch_dates_missing_file(tmp_path, log_html):
+    output_file = tmp_path / 'patches.csv'
+
+    assert get_patch_dates(output_file=str(output_file), html=log_html) == len(FIXTURE_ENTRIES)
+    assert read_patches(output_file) == FIXTURE_ENTRIES
+
+def test_get_patch_dates_raises_on_empty_page(tmp_path):
+    # What a client-side rendered page looks like to a plain GET
+    html = '<html><body><div id="__next"></div></body></html>'
+    output_file = tmp_path / 'patches.csv'
+    write_patches(output_file, FIXTURE_ENTRIES)
+
+    with pytest.raises(ValueError):
+        get_patch_dates(output_file=str(output_file), html=html)
+    assert read_patches(output_file) == FIXTURE_ENTRIES
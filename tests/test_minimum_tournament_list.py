@@ -0,0 +1,134 @@
+import os
+import json
+import datetime
+
+import pandas as pd
+import pytest
+from yt_dlp.utils import DownloadError
+
+from conftest import FIXTURES_DIR
+from minimum_tournament_list import (check_video, generate_youtube_info, pending_tournaments,
+                                     latest_match_dates, NEGATIVE_CACHE_TTL_DAYS)
+
+NOW = datetime.datetime(2024, 5, 1, tzinfo=datetime.timezone.utc)
+
+# Search results in the shape extract_info returns them, trimmed to the fields the script reads:
+# 150 and 155 are usable, 151 is modded, 152 has no results and 153 has every field None.
+# 154 isn't in the file, so searching for it fails like a network error.
+with open(os.path.join(FIXTURES_DIR, 'youtube_search_results.json'), 'r') as f:
+    SEARCH_RESULTS = json.load(f)
+
+
+class RecordedYDL:
+    """Stands in for YoutubeDL, answering searches from recorded payloads"""
+    def __init__(self, results=SEARCH_RESULTS, on_search=None):
+        self.results = results
+        self.on_search = on_search
+        self.queries = []
+
+    def extract_info(self, query, download=False):
+        self.queries.append(query)
+        if self.on_search:
+            self.on_search(query)
+        if query not in self.results:
+            raise DownloadError(f"Unable to download API page: {query}")
+        return self.results[query]
+
+def miss(days_ago, reason='low quality'):
+    return {'reason': reason, 'checked_at': (NOW - datetime.timedelta(days=days_ago)).isoformat()}
+
+def generate(tmp_path, tournaments, ydl, **kwargs):
+    output_file, misses_file = tmp_path / 'urls.json', tmp_path / 'misses.json'
+    videos = generate_youtube_info(tournaments, str(output_file), str(misses_file), ydl=ydl, max_workers=1,
+                                   **kwargs)
+    misses = json.loads(misses_file.read_text()) if misses_file.exists() else {}
+    return videos, misses
+
+
+def test_check_video_handles_missing_fields():
+    assert check_video({'uploader': None, 'title': None, 'formats': None}) == 'not uploaded by shygybeats'
+    assert check_video({'uploader': '` shygybeats `', 'title': None, 'formats': None}) == 'low quality'
+
+def test_resolves_and_caches_misses(tmp_path):
+    ydl = RecordedYDL()
+    videos, misses = generate(tmp_path, ['ToughLoveGauntlet150', 'ToughLoveGauntlet151', 'ToughLoveGauntlet152',
+                                         'ToughLoveGauntlet153'], ydl)
+
+    assert [video['tournament'] for video in videos] == ['ToughLoveGauntlet150']
+    assert videos[0]['video_url'] == 'https://www.youtube.com/watch?v=a1B2c3D4e5F'
+    assert {tournament: entry['reason'] for tournament, entry in misses.items()} == {
+        'ToughLoveGauntlet151': "contains 'modded' in title",
+        'ToughLoveGauntlet152': 'no search results',
+        'ToughLoveGauntlet153': 'not uploaded by shygybeats',
+    }
+
+def test_resolved_tournaments_are_skipped(tmp_path):
+    generate(tmp_path, ['ToughLoveGauntlet150'], RecordedYDL())
+
+    ydl = RecordedYDL()
+    videos, _ = generate(tmp_path, ['ToughLoveGauntlet150', 'ToughLoveGauntlet155'], ydl)
+    assert ydl.queries == ['ytsearch:Tough Love Gauntlet 155']
+    assert [video['tournament'] for video in videos] == ['ToughLoveGauntlet150', 'ToughLoveGauntlet155']
+
+def test_transient_errors_are_not_cached(tmp_path):
+    ydl = RecordedYDL()
+    videos, misses = generate(tmp_path, ['ToughLoveGauntlet154', 'ToughLoveGauntlet155'], ydl)
+
+    assert [video['tournament'] for video in videos] == ['ToughLoveGauntlet155']
+    assert misses == {}
+
+    # So the next run tries again
+    ydl = RecordedYDL()
+    generate(tmp_path, ['ToughLoveGauntlet154', 'ToughLoveGauntlet155'], ydl)
+    assert ydl.queries == ['ytsearch:Tough Love Gauntlet 154']
+
+def test_unexpected_error_does_not_abort_batch(tmp_path):
+    results = {**SEARCH_RESULTS, 'ytsearch:Tough Love Gauntlet 149': {'entries': [None]}}
+    videos, misses = generate(tmp_path, ['ToughLoveGauntlet149', 'ToughLoveGauntlet150'], RecordedYDL(results))
+
+    assert [video['tournament'] for video in videos] == ['ToughLoveGauntlet150']
+    assert misses == {}
+
+def test_results_written_as_they_arrive(tmp_path):
+    output_file = tmp_path / 'urls.json'
+    seen = []
+
+    def on_search(query):
+        seen.append(json.loads(output_file.read_text()) if output_file.exists() else None)
+
+    generate(tmp_path, ['ToughLoveGauntlet155', 'ToughLoveGauntlet150'], RecordedYDL(on_search=on_search))
+
+    # 150 is searched first, and is on disk by the time 155 is searched
+    assert seen[0] is None
+    assert [video['tournament'] for video in seen[1]] == ['ToughLoveGauntlet150']
+    assert [video['tournament'] for video in json.loads(output_file.read_text())] == [
+        'ToughLoveGauntlet150', 'ToughLoveGauntlet155']
+
+def test_pending_tournaments_expires_misses():
+    misses = {'fresh': miss(days_ago=2), 'expired': miss(days_ago=NEGATIVE_CACHE_TTL_DAYS + 1)}
+    videos = [{'tournament': 'resolved'}]
+
+    assert pending_tournaments(['resolved', 'fresh', 'expired', 'new'], videos, misses, now=NOW) == [
+        'expired', 'new']
+
+def test_pending_tournaments_recent_tournament_misses_expire_sooner():
+    tournament_dates = {
+        'last_week': NOW - datetime.timedelta(days=3),
+        'last_year': NOW - datetime.timedelta(days=365),
+    }
+    misses = {'last_week': miss(days_ago=2), 'last_year': miss(days_ago=2)}
+
+    assert pending_tournaments(['last_week', 'last_year'], [], misses, now=NOW,
+                               tournament_dates=tournament_dates) == ['last_week']
+    # Without dates every miss gets the full TTL
+    assert pending_tournaments(['last_week', 'last_year'], [], misses, now=NOW) == []
+
+def test_latest_match_dates():
+    df = pd.DataFrame({
+        'tournament': ['ToughLoveGauntlet150', 'ToughLoveGauntlet150', 'ToughLoveGauntlet151'],
+        'date': ['2024-04-02T18:30:00.000-05:00', '2024-04-02T21:10:00.000-05:00', '2024-04-09T18:30:00.000-05:00'],
+    })
+    assert latest_match_dates(df) == {
+        'ToughLoveGauntlet150': datetime.datetime(2024, 4, 3, 2, 10, tzinfo=datetime.timezone.utc),
+        'ToughLoveGauntlet151': datetime.datetime(2024, 4, 9, 23, 30, tzinfo=datetime.timezone.utc),
+    }
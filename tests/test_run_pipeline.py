@@ -0,0 +1,162 @@
+import subprocess
+
+import pytest
+
+import run_pipeline as pipeline
+from run_pipeline import Stage, run_pipeline
+
+
+@pytest.fixture
+def ran(monkeypatch, tmp_path):
+    """Names of the script stages that ran, in order. Stage scripts named 'fail*' exit non-zero"""
+    ran = []
+
+    def fake_run_script(metrics, script):
+        ran.append(script)
+        if script.startswith('fail'):
+            raise subprocess.CalledProcessError(1, script)
+        (tmp_path / f'{script}.out').write_text(script)
+
+    monkeypatch.setattr(pipeline, 'run_script', fake_run_script)
+    return ran
+
+@pytest.fixture
+def state_file(tmp_path):
+    return str(tmp_path / 'state.json')
+
+def script_stage(tmp_path, name, deps=(), inputs=(), always_run=False):
+    # Absolute paths pass through os.path.join(ROOT, ...) unchanged
+    return Stage(name=name, script=name, code=[], inputs=[str(tmp_path / path) for path in inputs],
+                 outputs=[str(tmp_path / f'{name}.out')], deps=list(deps), always_run=always_run)
+
+def partition_stage(tmp_path, name, partitions, deps=(), failing=()):
+    """A partitioned stage over {key: input bytes}; runs are logged as 'name:key'"""
+    log = []
+
+    def run_partition(key):
+        log.append(f'{name}:{key}')
+        if key in failing:
+            raise RuntimeError(f'{key} failed')
+        (tmp_path / f'{name}_{key}.out').write_text(key)
+        return 1
+
+    stage = Stage(name=name, code=[], deps=list(deps), partitions=lambda: partitions,
+                  run_partition=run_partition,
+                  partition_outputs=lambda key: [str(tmp_path / f'{name}_{key}.out')])
+    return stage, log
+
+
+def test_second_run_skips_fresh_stages(tmp_path, ran, state_file):
+    (tmp_path / 'input.csv').write_text('a')
+    stages = [script_stage(tmp_path, 'first', inputs=['input.csv']),
+              script_stage(tmp_path, 'second', deps=['first'], inputs=['first.out'])]
+
+    assert run_pipeline(stages=stages, state_file=state_file) == ({'first', 'second'}, set(), {})
+    assert ran == ['first', 'second']
+
+    ran.clear()
+    assert run_pipeline(stages=stages, state_file=state_file) == ({'first', 'second'}, set(), {})
+    assert ran == []
+
+def test_changed_input_reruns(tmp_path, ran, state_file):
+    (tmp_path / 'input.csv').write_text('a')
+    stages = [script_stage(tmp_path, 'first', inputs=['input.csv'])]
+    run_pipeline(stages=stages, state_file=state_file)
+
+    ran.clear()
+    (tmp_path / 'input.csv').write_text('b')
+    run_pipeline(stages=stages, state_file=state_file)
+    assert ran == ['first']
+
+def test_missing_output_reruns(tmp_path, ran, state_file):
+    stages = [script_stage(tmp_path, 'first')]
+    run_pipeline(stages=stages, state_file=state_file)
+
+    ran.clear()
+    (tmp_path / 'first.out').unlink()
+    run_pipeline(stages=stages, state_file=state_file)
+    assert ran == ['first']
+
+def test_force_and_always_run(tmp_path, ran, state_file):
+    stages = [script_stage(tmp_path, 'fetch', always_run=True), script_stage(tmp_path, 'derived')]
+    run_pipeline(stages=stages, state_file=state_file)
+
+    ran.clear()
+    run_pipeline(stages=stages, state_file=state_file)
+    assert ran == ['fetch']
+
+    ran.clear()
+    run_pipeline(stages=stages, state_file=state_file, force=True)
+    assert sorted(ran) == ['derived', 'fetch']
+
+def test_failed_stage_skips_dependents(tmp_path, ran, state_file):
+    stages = [script_stage(tmp_path, 'fail_fetch'),
+              script_stage(tmp_path, 'derived', deps=['fail_fetch']),
+              script_stage(tmp_path, 'independent')]
+
+    done, failed, _ = run_pipeline(stages=stages, state_file=state_file)
+    assert done == {'independent'}
+    assert failed == {'fail_fetch', 'derived'}
+    assert 'derived' not in ran
+
+    # Nothing was fingerprinted for the failure, so it is retried
+    ran.clear()
+    run_pipeline(stages=stages, state_file=state_file)
+    assert ran == ['fail_fetch']
+
+def test_failed_partition_lets_dependents_run(tmp_path, ran, state_file):
+    ocr, ocr_log = partition_stage(tmp_path, 'ocr', {'tlg_1': b'1', 'tlg_2': b'2'}, failing={'tlg_1'})
+    matchups, matchups_log = partition_stage(tmp_path, 'matchups', {'tlg_2': b'2'}, deps=['ocr'])
+
+    done, failed, failed_partitions = run_pipeline(stages=[ocr, matchups], state_file=state_file)
+    assert done == {'ocr', 'matchups'}
+    assert failed == set()
+    assert failed_partitions == {'ocr': ['tlg_1']}
+    assert matchups_log == ['matchups:tlg_2']
+
+    # Only the failed partition is retried
+    ocr_log.clear()
+    run_pipeline(stages=[ocr, matchups], state_file=state_file)
+    assert ocr_log == ['ocr:tlg_1']
+
+def test_changed_partition_reruns_alone(tmp_path, ran, state_file):
+    partitions = {'tlg_1': b'1', 'tlg_2': b'2'}
+    ocr, log = partition_stage(tmp_path, 'ocr', partitions)
+    run_pipeline(stages=[ocr], state_file=state_file)
+
+    log.clear()
+    partitions['tlg_2'] = b'new vod'
+    partitions['tlg_3'] = b'3'
+    run_pipeline(stages=[ocr], state_file=state_file)
+    assert log == ['ocr:tlg_2', 'ocr:tlg_3']
+
+def test_targets_include_dependencies(tmp_path, ran, state_file):
+    stages = [script_stage(tmp_path, 'first'), script_stage(tmp_path, 'second', deps=['first']),
+              script_stage(tmp_path, 'other')]
+
+    done, _, _ = run_pipeline(['second'], stages=stages, state_file=state_file)
+    assert done == {'first', 'second'}
+    assert ran == ['first', 'second']
+
+def test_unknown_target(tmp_path, ran, state_file):
+    with pytest.raises(ValueError, match='Unknown stage'):
+        run_pipeline(['missing'], stages=[script_stage(tmp_path, 'first')], state_file=state_file)
+
+def test_dependency_cycle(tmp_path, ran, state_file):
+    stages = [script_stage(tmp_path, 'first', deps=['second']),
+              script_stage(tmp_path, 'second', deps=['first'])]
+
+    with pytest.raises(ValueError, match='Dependency cycle'):
+        run_pipeline(stages=stages, state_file=state_file)
+    assert ran == []
+
+def test_script_stage_runs_script(tmp_path, state_file):
+    # No fake run_script here: the script really runs in a subprocess
+    output = tmp_path / 'written.txt'
+    script = tmp_path / 'write_output.py'
+    script.write_text(f'open({str(output)!r}, "w").write("done")\n')
+    stage = Stage(name='write', script=str(script), code=[str(script)], outputs=[str(output)])
+
+    done, _, _ = run_pipeline(stages=[stage], state_file=state_file)
+    assert done == {'write'}
+    assert output.read_text() == 'done'